@@ -22,9 +22,11 @@ def main():
                        ["Part 2", 300000, 100, [[2, 4], [1, 5], [0, 3], [3, 2]]],
                        ["Part 3", 400000, 100, [[3, 5], [2, 1], [0, 4], [1, 4]]]]
 
-    environment = RealTimeEnvironment(production_plan=production_plan)
-
     try:
+        # Creating the environment also sets up the factory and starts the actual opc server, Ctrl+C during that
+        # raises KeyboardInterrupt, while the simulation runs it stops the simulation at the next animation tick
+        environment = RealTimeEnvironment(production_plan=production_plan, verbose=True,
+                                          read_quit_command=True)
         environment.run()
         print("Simulation Successfully Over")
     except KeyboardInterrupt:
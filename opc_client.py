@@ -1,13 +1,32 @@
+import time
+
 from opcua import Client
 
 
+class DataChangeHandler(object):
+    """
+    Handler for the subscription, the server notifies it only when the subscribed variable's value changes
+    instead of the client reading the value again and again
+    """
+
+    def datachange_notification(self, node, val, data):
+        print(node, val)
+
+
 if __name__ == "__main__":
 
     client = Client("opc.tcp://localhost:4840/freeopcua/server/")
     # client = Client("opc.tcp://admin@localhost:4840/freeopcua/server/") #connect using a user
     try:
         client.connect()
-        print(client.get_node("ns=2;i=2").get_value())
+
+        # subscribing to data changes with a publishing interval of 1000 ms
+        handler = DataChangeHandler()
+        subscription = client.create_subscription(1000, handler)
+        subscription.subscribe_data_change(client.get_node("ns=2;i=2"))
+
+        while True:
+            time.sleep(1)
 
     except KeyboardInterrupt:
         print('Interrupted')
@@ -10,9 +10,6 @@ This script requires the following modules be installed in the python environmen
     features, resources, queues, monitors, statistical distributions.
     * asyncua - An asyncio-based asynchronous OPC UA client and server, based on python-opcua
 
-    * keyboard - Module for keyboard interaction
-    *prettytable - Module to prints data in a pretty table format
-
 This script contains the following classes
     * RealTimeEnvironment - Class that inherits sim.Environment, with few additonal attributes, methods to make
     the simulation run in real time
@@ -21,6 +18,7 @@ This script contains the following classes
     which will be a component in the simulation environment and update the actual opc server's data
 
     * Machine - This class is used to represent a machine in the simulation environment
+    * PartFamily - This class is used for holding the details shared by every part of a family.
     * Part - This class is used for representing a Part that needs to be manufactured.
     * PartGenerator - This class is used for creating new parts according to production plan.
 
@@ -32,27 +30,32 @@ This script contains the following functions
 """
 
 # Standard Built_In Packages
+import asyncio
+import collections
+import datetime
+import functools
+import operator
+import signal
 import sys
+import threading
 
 # Core packages required for the Script
 import salabim as sim
+from asyncua import ua
 from asyncua.sync import Server
 
-# Other external packages
-import keyboard
-from prettytable import PrettyTable
-
 
 class RealTimeEnvironment(sim.Environment):
     """
     New class for simulating real time environment, i.e the simulation will happen real time rather than
-    completing the whole simulation in few seconds, every second data will be updated
+    completing the whole simulation in few seconds. While any machine is running or changes its state the data is
+    updated every second, while all of them are idle the opc server waits for the next change
     """
 
     def __init__(self, animation=True, animation_fps=1,
                  animation_synced=True, animation_visibility=False, number_of_machines=4,
                  production_plan=(("Part 0", 100000, 10, [[0, 2]]), ("Part 1", 200000, 10, [[1, 4]])),
-                 *args, **kwargs):
+                 verbose=False, read_quit_command=False, *args, **kwargs):
         """
         :param animation: Parameter to set whether animation has be set, default is true, which is essential for
         real time simulation
@@ -69,17 +72,34 @@ class RealTimeEnvironment(sim.Environment):
         :type number_of_machines: int
         :param production_plan: The master production plan consisting of part details and production task sequence
         :type production_plan:Union[tuple, list]
+        :param verbose: Parameter to set whether the animation time and the table of machine data have to be printed
+        every second, default is false so that the simulation doesn't spend time on console output nobody reads
+        :type verbose: bool
+        :param read_quit_command: Parameter to set whether entering "q" in the console stops the simulation, default is
+        false since the thread waiting for it takes over the standard input for the rest of the process (it can't be
+        stopped while blocked reading a line), so it should only be set by scripts that don't read the console
+        themselves. It has no effect without animation, as the stop is only checked at an animation tick
+        :type read_quit_command: bool
         """
         # Attributes from the given arguments.
         self.number_of_machines = number_of_machines
-        print(number_of_machines)
         self.production_plan = production_plan
+        self.verbose = verbose
+        if verbose:
+            print(number_of_machines)
+        self.read_quit_command = read_quit_command
         self.opc_server = None
         self.opc_namespace = None
 
         # Default factory environment attributes
         self.units_of_factory = {"machines": None, "part_generator": [], "opc_server": []}
 
+        # Flag set when the user asks to stop the simulation, either with Ctrl+C or by entering "q", it's only checked
+        # once every animation tick rather than polling the keyboard. The Ctrl+C handler is only installed while an
+        # animated simulation runs, and the thread waiting for "q" (if requested) is started by the first such run.
+        self._stop_requested = False
+        self._quit_command_reader = None
+
         # Initializing the super class has to done only after initializing the above attributes
         # Because during the super's initializing the setup function(immediately after) is run where the above
         # Attributes are required, hence an error is raised saying the above attribute is not there.
@@ -115,7 +135,8 @@ class RealTimeEnvironment(sim.Environment):
         self.opc_server, self.opc_namespace = create_opc_server()
 
         # Creating a salabim simulated opc server and appending it to the environment's attribute
-        self.units_of_factory["opc_server"].append(OpcServer(self, self.opc_server, self.opc_namespace))
+        self.units_of_factory["opc_server"].append(OpcServer(self, self.opc_server, self.opc_namespace,
+                                                             verbose=self.verbose))
 
     def animation_pre_tick(self, current_time):
         """
@@ -123,27 +144,66 @@ class RealTimeEnvironment(sim.Environment):
         the whole simulation (even for large time units) will be finished in few seconds and the summary results
         will be shown. Hence we create an animation, which allows us to call this function just before a new frame
         for animation is created ( which will be 1 fps and synced with actual real clock). This doesn't actually
-        show any animation as we have set the visibility to false and no animation objects are created, it just prints
-        the current animation time (which is synced/equal to the working device's local time)
+        show any animation as we have set the visibility to false and no animation objects are created, it just stops
+        the simulation (and the actual opc server) if the user requested it, and when verbose prints the current
+        animation time (which is synced/equal to the working device's local time)
 
         :param current_time: The current animation time
         :type current_time: float
         :return: Nothing
         :rtype: None
         """
-        if keyboard.is_pressed("q"):
+        if self._stop_requested:
             self.opc_server.stop()
             print("Simulation Interrupted")
             sys.exit()
-        print("Current Animation Time: ", current_time)
+        if self.verbose:
+            print("Current Animation Time: ", current_time)
+
+    def _request_stop(self, *args):
+        """
+        Signal handler which requests the simulation to stop at the next animation tick
+
+        :return: Nothing
+        :rtype: None
+        """
+        self._stop_requested = True
+
+    def _wait_for_quit_command(self):
+        """
+        Runs in a background thread and requests the simulation to stop as soon as "q" is entered in the console
+
+        :return: Nothing
+        :rtype: None
+        """
+        for line in sys.stdin:
+            if line.strip() == "q":
+                self._request_stop()
+                return
 
     def run(self, *args, **kwargs):
         """
-        Overwriting the existing run function so that after simulation a clean up function can be called
+        Overwriting the existing run function so that after simulation a clean up function can be called.
+        While an animated simulation runs, Ctrl+C requests it to stop at the next animation tick instead of raising
+        KeyboardInterrupt, the previous handler is restored afterwards. Without animation there is no tick to check
+        the request, hence Ctrl+C keeps raising KeyboardInterrupt.
         :return: Nothing
         :rtype: None
         """
-        super().run(*args, **kwargs)
+        if not self._animate:
+            super().run(*args, **kwargs)
+            self._post_simulation()
+            return
+
+        if self.read_quit_command and self._quit_command_reader is None:
+            self._quit_command_reader = threading.Thread(target=self._wait_for_quit_command, daemon=True)
+            self._quit_command_reader.start()
+
+        previous_sigint_handler = signal.signal(signal.SIGINT, self._request_stop)
+        try:
+            super().run(*args, **kwargs)
+        finally:
+            signal.signal(signal.SIGINT, previous_sigint_handler)
         self._post_simulation()
 
     def _post_simulation(self):
@@ -161,7 +221,22 @@ class OpcServer(sim.Component):
     in the simulation environment and update the actual opc server's data
     """
 
-    def __init__(self, environment, server, namespace, *args, **kwargs):
+    # Fixed width templates used to print the table of machine data every second, built once instead of
+    # constructing and measuring a new table on every tick. The times are only rounded to 2 decimals when printed.
+    _TABLE_ROW_FORMAT = "| {:>10} | {:>10} | {:>10.2f} | {:>14.2f} |"
+    _TABLE_BORDER = "+------------+------------+------------+----------------+"
+    _TABLE_HEADER = "| Machine Id | Part Count | Cycle Time | Operating Time |"
+    _SEPARATOR = "=" * 90
+
+    # Variant types of every machine's (part_count, cycle_time, operating_time) opc variables, given explicitly on
+    # every write so that the type doesn't have to be inferred from each value
+    _OPC_VARIANT_TYPES = (ua.VariantType.Int64, ua.VariantType.Double, ua.VariantType.Double)
+
+    # Reads all the machine attributes needed for an update in a single call
+    _get_machine_data = staticmethod(operator.attrgetter("machine_id", "parts", "cycle_time", "operating_time",
+                                                         "machine_status", "cycle_time_start", "state_changed"))
+
+    def __init__(self, environment, server, namespace, verbose=False, *args, **kwargs):
         """
         :param environment: The environment this component is part of
         :type environment:
@@ -169,6 +244,8 @@ class OpcServer(sim.Component):
         :type server:
         :param namespace: The actual Opc server's namespace
         :type namespace:
+        :param verbose: Parameter to set whether the table of machine data has to be printed on every update
+        :type verbose: bool
         """
 
         sim.Component.__init__(self, *args, **kwargs)
@@ -176,30 +253,53 @@ class OpcServer(sim.Component):
         self.environment = environment
         self._opc_server = server
         self.namespace = namespace
+        self._verbose = verbose
 
         # Derived attributes
         self.simulated_machines = environment.units_of_factory["machines"]
-        # List of all opc machine objects
-        self._opc_machine_objects = []
 
-        # get Objects node, this is where we should put our nodes
-        root_objects = server.nodes.objects
+        # Flag set only while this component is passive waiting for a machine's state change, so that a machine can
+        # check whether the server has to be activated without querying salabim for the component's status
+        self.is_waiting_for_changes = False
+
+        # List of the node ids of the (part_count, cycle_time, operating_time) opc variables for every machine,
+        # cached once so that the nodes don't have to be browsed or resolved again on every update. All the nodes are
+        # created by a single coroutine run on the sync server's event loop thread, rather than waiting for that
+        # thread on every single node that is added or made writable.
+        self._opc_machine_node_ids = server.tloop.post(self._add_opc_machine_nodes(server.aio_obj.nodes.objects,
+                                                                                   namespace))
+
+        server.start()
+
+    async def _add_opc_machine_nodes(self, root_objects, namespace):
+        """
+        Populates the actual opc server's address space with an object for every machine, holding its machine id and
+        the part_count, cycle_time and operating_time variables (which are made writable by clients)
+
+        :param root_objects: The (asynchronous) Objects node of the actual opc server, where the nodes are added
+        :type root_objects: asyncua.Node
+        :param namespace: The actual Opc server's namespace
+        :type namespace: int
+        :return: The node ids of every machine's (part_count, cycle_time, operating_time) variables
+        :rtype: list
+        """
+        opc_machine_node_ids = []
         for index, machine in enumerate(self.simulated_machines):
 
             # populating our address space
             machine_name = "my_machine_" + str(index)
-            current_machine = root_objects.add_object(namespace, machine_name)
-            current_machine.add_variable(namespace, "machine_id", index)
-            current_part_count = current_machine.add_variable(namespace, "part_count", 0)
-            current_cycle_time = current_machine.add_variable(namespace, "cycle_time", 0.0)
-            current_operating_time = current_machine.add_variable(namespace, "operating_time", 0.0)
-
-            current_part_count.set_writable()  # Set MyVariable to be writable by clients
-            current_cycle_time.set_writable()  # Set MyVariable to be writable by clients
-            current_operating_time.set_writable()  # Set MyVariable to be writable by clients
-            self._opc_machine_objects.append(current_machine)
-
-        server.start()
+            current_machine = await root_objects.add_object(namespace, machine_name)
+            await current_machine.add_variable(namespace, "machine_id", index)
+            current_part_count = await current_machine.add_variable(namespace, "part_count", 0)
+            current_cycle_time = await current_machine.add_variable(namespace, "cycle_time", 0.0)
+            current_operating_time = await current_machine.add_variable(namespace, "operating_time", 0.0)
+
+            await current_part_count.set_writable()  # Set MyVariable to be writable by clients
+            await current_cycle_time.set_writable()  # Set MyVariable to be writable by clients
+            await current_operating_time.set_writable()  # Set MyVariable to be writable by clients
+            opc_machine_node_ids.append((current_part_count.nodeid, current_cycle_time.nodeid,
+                                         current_operating_time.nodeid))
+        return opc_machine_node_ids
 
     def process(self):
         """
@@ -210,45 +310,137 @@ class OpcServer(sim.Component):
         :return: Nothing
         :rtype: None
         """
+        # The methods and attributes used for every machine on every update don't change, so they are bound to
+        # locals only once rather than looked up again in each iteration
+        simulated_machines = self.simulated_machines
+        opc_machine_node_ids = self._opc_machine_node_ids
+        opc_machine_variant_types = self._OPC_VARIANT_TYPES
+        get_machine_data = self._get_machine_data
+        format_table_row = self._TABLE_ROW_FORMAT.format
+        get_now = self.environment.now
+        verbose = self._verbose
+
         while True:
-            # Creating a pretty table.
-            table = PrettyTable(["Machine Id", "Part Count", "Cycle Time", "Operating Time"])
+            # If no machine changed its state since the last update and none of them is executing a cycle (which is
+            # the only thing that changes the data between state changes), there is nothing new to publish. So instead
+            # of waking up every second, this component is made passive until a machine activates it on a state change
+            if not any(machine.state_changed or machine.machine_status == 1 for machine in simulated_machines):
+                self.is_waiting_for_changes = True
+                yield self.passivate()
+                continue
+
+            # The simulation time doesn't change within an update, so it is taken only once
+            now = get_now()
+
+            # Lines printed at the end of this update, written to the console all at once (only if verbose)
+            if verbose:
+                output_lines = [self._SEPARATOR, "", "Current Simulation Time: " + str(round(now, 2)),
+                                self._TABLE_BORDER, self._TABLE_HEADER, self._TABLE_BORDER]
 
-            for index, machine in enumerate(self.simulated_machines):
+            # The node ids of the opc variables to be updated, their new values and variant types, written together
+            # at the end of this update
+            opc_node_ids = []
+            opc_values = []
+            opc_variant_types = []
+
+            for index, machine in enumerate(simulated_machines):
 
                 # For every machine in the simulation environment we perform the following operations
-                cycle_time = machine.cycle_time
-                operating_time = machine.operating_time
-                if machine.machine_status == 1:
+                (machine_id, parts, cycle_time, operating_time, machine_status, cycle_time_start,
+                 state_changed) = get_machine_data(machine)
+                if machine_status == 1:
                     # If and only if the machine is currently executing a cycle the following changes will be made.
 
-                    # Every second the cycle time is updated (just like an actual controller)
-                    cycle_time = self.environment.now() - machine.cycle_time_start
+                    # Every second the cycle time is updated (just like an actual controller). The clock gives an int
+                    # when all the holds are integers, but the opc variable is a Double, hence the conversion
+                    cycle_time = float(now - cycle_time_start)
                     machine.cycle_time = cycle_time
                     operating_time += cycle_time
-                machine_data = [machine.machine_id, machine.parts, float(round(cycle_time, 2)),
-                                float(round(operating_time, 2))]
-                table.add_row(machine_data)
-                opc_machine = self._opc_machine_objects[index]
-                machine_parameters = opc_machine.get_children()
-
-                for inner_index in range(1, len(machine_parameters)):
-                    machine_parameters[inner_index].write_value(machine_data[inner_index])
-
-            print("==========================================================================================")
-            print()
-            print("Current Simulation Time: " + str(round(self.environment.now(), 2)))
-            print(table)
-            print()
-            print("==========================================================================================")
+                if verbose:
+                    output_lines.append(format_table_row(machine_id, parts, cycle_time, operating_time))
+
+                if state_changed or machine_status == 1:
+                    # An idle machine whose state didn't change still has the same data in the opc server as the last
+                    # update, hence only the changed or running machines are written
+                    opc_node_ids.extend(opc_machine_node_ids[index])
+                    opc_values.extend((parts, cycle_time, operating_time))
+                    opc_variant_types.extend(opc_machine_variant_types)
+                    machine.state_changed = False
+
+            if opc_node_ids:
+                self._write_values(opc_node_ids, opc_values, opc_variant_types)
+
+            if verbose:
+                output_lines.extend((self._TABLE_BORDER, "", self._SEPARATOR, ""))
+                sys.stdout.write("\n".join(output_lines))
             yield self.hold(1)
 
+    def _write_values(self, node_ids, values, variant_types):
+        """
+        Writes the given values to the given opc variables of the actual opc server in a single write request,
+        instead of one request (each waiting for the server's event loop thread) per variable. The request is only
+        handed over to the server's event loop, the simulation doesn't wait for it to be completed.
+
+        :param node_ids: The node ids of the opc variables to be written
+        :type node_ids: list
+        :param values: The new values of the variables, in the same order as the node ids
+        :type values: list
+        :param variant_types: The variant types of the variables, in the same order as the node ids
+        :type variant_types: list
+        :return: Nothing
+        :rtype: None
+        """
+        parameters = ua.WriteParameters()
+
+        # All the values of an update are sampled at the same time, so they share a single (timezone aware, just like
+        # asyncua's own writes) source timestamp
+        source_timestamp = datetime.datetime.now(datetime.timezone.utc)
+
+        # Binding the names used for every variable to locals, so that they aren't looked up again for each of them
+        new_write_value = ua.WriteValue
+        new_data_value = ua.DataValue
+        new_variant = ua.Variant
+        value_attribute = ua.AttributeIds.Value
+        add_write_value = parameters.NodesToWrite.append
+        for node_id, value, variant_type in zip(node_ids, values, variant_types):
+            write_value = new_write_value()
+            write_value.NodeId = node_id
+            write_value.AttributeId = value_attribute
+            write_value.Value = new_data_value(new_variant(value, variant_type), SourceTimestamp=source_timestamp)
+            add_write_value(write_value)
+
+        # The sync server is a wrapper running the asyncio server in its own thread, the whole request is scheduled
+        # on that thread's event loop at once and its results are checked there when it's done
+        write_request = asyncio.run_coroutine_threadsafe(self._opc_server.aio_obj.iserver.isession.write(parameters),
+                                                         self._opc_server.tloop.loop)
+        write_request.add_done_callback(self._check_write_results)
+
+    @staticmethod
+    def _check_write_results(write_request):
+        """
+        Callback run once a write request to the actual opc server is done, reporting the variables that couldn't
+        be written
+
+        :param write_request: The completed write request
+        :type write_request: concurrent.futures.Future
+        :return: Nothing
+        :rtype: None
+        """
+        for result in write_request.result():
+            if not result.is_good():
+                print("Writing to the OPC server failed: " + result.name)
+
 
 class Machine(sim.Component):
     """
     This class is used to represent a machine in the simulation environment
     """
 
+    # The machine's own attributes are kept in slots, read by the parts and the OpcServer on every routing and update
+    # (sim.Component has no slots, so the salabim attributes still live in the instance dictionary)
+    __slots__ = ("environment", "machine_name", "machine_id", "machine_queue", "parts", "cycle_time_start",
+                 "cycle_time", "operating_time", "machine_status", "current_part", "state_changed", "is_idle")
+
     def __init__(self, machine_name, machine_id, environment, *args, **kwargs):
         """
         :param machine_name: Name of the machine
@@ -265,8 +457,9 @@ class Machine(sim.Component):
         self.machine_name = machine_name
         self.machine_id = machine_id
 
-        # Attributes created using (Other) sim objects.
-        self.machine_queue = sim.Queue(f"queue_{machine_id}")
+        # Queue of the parts waiting to be processed on this machine, a plain deque rather than a sim.Queue since
+        # none of the salabim queue statistics are used
+        self.machine_queue = collections.deque()
 
         # Important parameters of a machine for Performance Metric calculation
         self.parts = 0
@@ -276,63 +469,93 @@ class Machine(sim.Component):
         self.machine_status = 0
         self.current_part = None
 
+        # Flag set whenever the machine's status or part count changes, it's cleared once the OpcServer publishes
+        # the data. It starts as set so that the initial state is published.
+        self.state_changed = True
+
+        # Flag set only while the machine is passive waiting for a part, so that a part can check whether the machine
+        # has to be activated without querying salabim for the component's status
+        self.is_idle = False
+
     def process(self):
+        # The clock and the hold method are used on every cycle, so they are bound to locals only once
+        get_now = self.environment.now
+        hold = self.hold
+
         while True:
 
             while len(self.machine_queue) == 0:
                 # If the machine's queue is empty, it will be made passive.
+                self.is_idle = True
                 yield self.passivate()
 
             # Taking the first part from the queue (as soon as it is activated by a part).
             # And making it as the machine's current part in progress.
-            self.current_part = self.machine_queue.pop()
+            self.current_part = self.machine_queue.popleft()
 
             # Setting the machine status as 1, meaning it is currently executing a cycle.
             self.machine_status = 1
+            self._set_state_changed()
 
             # Setting the current cycle's start time as the current time in the simulation environment.
-            self.cycle_time_start = self.environment.now()
+            self.cycle_time_start = get_now()
             # Setting the live-real-time cycle as 0 (as it does in an actual machine controller {like fanuc}).
             self.cycle_time = 0.0
 
             # The machine is held for a time equivalent to the current part's processing time.
-            # self.current_part.remaining_sequence[0] gives the first task left in the remaining set of tasks.
-            yield self.hold(self.current_part.current_processing_time)
+            processing_time = self.current_part.current_processing_time
+            yield hold(processing_time)
 
             # After processing, setting the machine status as 0, meaning it is currently idle.
             self.machine_status = 0
             # Increasing the part count by 1.
             self.parts += 1
+            self._set_state_changed()
 
-            # There is a loss of one second (Maybe some problem with the Server Class) hence
-            # We're calculating cycle time again by using the below formula, to get exact values
-            self.cycle_time = self.environment.now() - self.cycle_time_start
+            # The hold advances the simulation time by exactly the processing time, hence that is the cycle time of
+            # the finished cycle (the OpcServer only shows a live cycle time lagging behind between its updates)
+            self.cycle_time = float(processing_time)
             # Increasing the operating time by an amount equal to the last cycle time.
             self.operating_time += self.cycle_time
 
-            # Activating the current part.
-            self.current_part.activate()
+            # Sending the current part to the machine of its next task.
+            self.current_part.route()
 
             # Setting the current part for the machine to None
             self.current_part = None
 
             # The hold below is to represent the time delay to remove the current part and place the next one.
-            yield self.hold(3)
+            yield hold(3)
+
+    def _set_state_changed(self):
+        """
+        Flags that the machine's status or part count has changed and activates the simulated opc servers which are
+        passive waiting for such a change to publish
+
+        :return: Nothing
+        :rtype: None
+        """
+        self.state_changed = True
+        for opc_server in self.environment.units_of_factory["opc_server"]:
+            if opc_server.is_waiting_for_changes:
+                opc_server.is_waiting_for_changes = False
+                opc_server.activate()
 
 
-class Part(sim.Component):
+class PartFamily:
     """
-    This class is used for representing a Part that needs to be manufactured.
+    This class is used for holding the details shared by every part of a family, so that they are stored only once
+    rather than on every part that needs to be manufactured.
     """
 
-    def __init__(self, name, family_number, number, machining_sequence, environment, *args, **kwargs):
+    __slots__ = ("name", "family_number", "machining_sequence", "machining_steps")
+
+    def __init__(self, name, family_number, machining_sequence, machines):
         """
-        :param name: Name of the part
+        :param name: Name of the parts in this family
         :type name: str
-        :param family_number: Family number of the part, many parts of one family will be manufactured
+        :param family_number: Family number of the parts
         :type family_number: int
-        :param number: part number, which also includes the family number
-        :type number: int
         :param machining_sequence: An array describing the sequence of task, with the corresponding machine and
         machining time on that machine. For instance
 
@@ -342,36 +565,67 @@ class Part(sim.Component):
         the second task has to be done on Machine 2, with a processing time of 400s,
         the third task has to be done on Machine 1, with a processing time of 500s.
 
-        :type machining_sequence: list
-        :param args: Other positional arguments required for the sim.Component class
-        :type args: object
-        :param kwargs: Other keyword arguments required for the sim.Component class
-        :type kwargs: object
+        :type machining_sequence: Union[tuple, list]
+        :param machines: The simulated machines of the factory, indexed by machine id
+        :type machines: list
         """
-        sim.Component.__init__(self, *args, **kwargs)
-        self.part_name = name
-        self.part_family_number = family_number
-        self.part_number = number
+        self.name = name
+        self.family_number = family_number
         self.machining_sequence = machining_sequence
-        self.environment = environment
-        self.current_sequence = None
+
+        # The machining sequence resolved into (simulated machine, processing time) pairs, the machines don't
+        # change during the simulation, so they are looked up only once per family
+        self.machining_steps = tuple((machines[machine_id], processing_time)
+                                     for machine_id, processing_time in machining_sequence)
+
+
+class Part:
+    """
+    This class is used for representing a Part that needs to be manufactured. A part doesn't need a process of its
+    own in the simulation, it's just passed from one machine's queue to the next, hence it's a plain object rather
+    than a salabim component.
+    """
+
+    # A part is created for every unit in the production plan, so its attributes are kept in slots rather than in an
+    # instance dictionary
+    __slots__ = ("part_family", "part_number", "current_machine", "current_processing_time", "_next_step")
+
+    def __init__(self, family, number):
+        """
+        :param family: The family of the part, holding its name, family number and machining sequence
+        :type family: PartFamily
+        :param number: part number, which also includes the family number
+        :type number: int
+        """
+        self.part_family = family
+        self.part_number = number
         self.current_machine = None
         self.current_processing_time = 0
 
-    def process(self):
-        # The process keeps looping until there is no more task left in the sequence of operations
-        for sequence in self.machining_sequence:
+        # Index of the next step in the family's machining sequence
+        self._next_step = 0
 
-            # sequence gives the list consisting of next task's machine id and processing time
-            self.current_sequence = sequence
+    def route(self):
+        """
+        Sends the part to the queue of the machine of its next machining step, activating that machine if it's idle.
+        Once there is no more task left in the sequence of operations the part is finished and goes nowhere.
 
-            # We're taking the simulated machine from environment based on the current sequence's machine id
-            self.current_machine = self.environment.units_of_factory["machines"][sequence[0]]
-            self.current_processing_time = sequence[1]
-            self.enter(self.current_machine.machine_queue)
-            if self.current_machine.ispassive():
-                self.current_machine.activate()
-            yield self.passivate()
+        :return: Nothing
+        :rtype: None
+        """
+        machining_steps = self.part_family.machining_steps
+        if self._next_step == len(machining_steps):
+            self.current_machine = None
+            return
+
+        machine, processing_time = machining_steps[self._next_step]
+        self._next_step += 1
+        self.current_machine = machine
+        self.current_processing_time = processing_time
+        machine.machine_queue.append(self)
+        if machine.is_idle:
+            machine.is_idle = False
+            machine.activate()
 
 
 class PartGenerator(sim.Component):
@@ -397,18 +651,45 @@ class PartGenerator(sim.Component):
         :type part_details: list
         """
         sim.Component.__init__(self, *args, **kwargs)
-        self.part_details = part_details
         self.environment = environment
 
+        # The part details are frozen into tuples once, the machining sequence of a part family is then a single
+        # immutable object shared by every part of that family
+        self.part_details = tuple((part_family[0], part_family[1], part_family[2],
+                                   tuple((machine_id, time) for machine_id, time in part_family[-1]))
+                                  for part_family in part_details)
+
     def process(self):
-        print(self.environment.main().scheduled_time())
-        for part_family in self.part_details:
-            for part in range(part_family[2]):
-                Part(part_family[0], part_family[1], int(str(part_family[1]) + str(part)),
-                     part_family[-1], self.environment)
+        if self.environment.verbose:
+            print(self.environment.main().scheduled_time())
+        # The part class is bound to a local, as it's used for every part created below
+        new_part = Part
+        machines = self.environment.units_of_factory["machines"]
+        for part_name, family_number, quantity, machining_sequence in self.part_details:
+            part_family = PartFamily(part_name, family_number, machining_sequence, machines)
+
+            # The part number is the family number followed by the part's index, padded to the quantity's digits
+            # E.g. family 100000 with a quantity of 100 gives the part numbers 10000000 to 10000099
+            base_part_number = family_number * _part_number_multiplier(quantity)
+            for part in range(quantity):
+                new_part(part_family, base_part_number + part).route()
             # yield self.hold(1)
 
 
+@functools.lru_cache(maxsize=None)
+def _part_number_multiplier(quantity):
+    """
+    Function used to get the power of 10 by which a family number is shifted, to make room for the indices of
+    the family's parts. Families usually have the same few quantities, hence the results are cached.
+
+    :param quantity: The number of parts in the family
+    :type quantity: int
+    :return: The smallest power of 10 that has more digits than the highest part index
+    :rtype: int
+    """
+    return 10 ** len(str(quantity - 1))
+
+
 def create_machining_units(number_of_units, environment):
     """
     Function used to create a given number of  machines.
@@ -420,8 +701,7 @@ def create_machining_units(number_of_units, environment):
     :return: A list containing a given number of machines of type `Machine`
     :rtype: list
     """
-    machining_units = [Machine(machine_name="VMC", machine_id=machine, environment=environment)
-                       for machine in range(number_of_units)]
+    machining_units = [Machine("VMC", machine_id, environment) for machine_id in range(number_of_units)]
     return machining_units
 
 
@@ -458,9 +738,11 @@ def main():
                        ["Part 2", 300000, 100, [[2, 4], [1, 5], [0, 3], [3, 2]]],
                        ["Part 3", 400000, 100, [[3, 5], [2, 1], [0, 4], [1, 4]]]]
 
-    environment = RealTimeEnvironment(production_plan=production_plan)
-
     try:
+        # Creating the environment also sets up the factory and starts the actual opc server, Ctrl+C during that
+        # raises KeyboardInterrupt, while the simulation runs it stops the simulation at the next animation tick
+        environment = RealTimeEnvironment(production_plan=production_plan, verbose=True,
+                                          read_quit_command=True)
         environment.run()
         print("Simulation Successfully Over")
     except KeyboardInterrupt: